@@ -134,8 +134,8 @@ def main():
         
         print("Generated Haiku:")
         print("┌─────────────────────────────────────────┐")
-        for line in haiku.split('\n'):
-            syllables = counter.count_phrase(line)
+        lines = haiku.split('\n')
+        for line, syllables in zip(lines, counter.count_phrases(lines)):
             print(f"│ {line:40}│ ({syllables} syllables)")
         print("└─────────────────────────────────────────┘")
         
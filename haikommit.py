@@ -6,49 +6,119 @@ Haikommit - Generate haiku commit messages from git diffs
 import sys
 import re
 import subprocess
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Iterable, Iterator
 import json
 import os
+import string
+from itertools import chain, islice
+
+# Precompiled patterns shared by the syllable counter
+_WORD_RE = re.compile(r'[a-zA-Z]+')
+_CLEAN_RE = re.compile(r'[^a-z]')
+
+# Maps each lowercase letter to '1' (vowel) or '0' (consonant)
+_VOWEL_MASK = str.maketrans({
+    char: '1' if char in 'aeiouy' else '0' for char in string.ascii_lowercase
+})
+
+# Precompiled patterns shared by the diff analyzer
+_FILE_RE = re.compile(r'(?:diff --git a/|[\+\-]{3} [ab]/)([^\s]+)')
+_FUNC_RE = re.compile(r'(?:function|def|class|const|let|var)\s+([a-zA-Z_][a-zA-Z0-9_]*)')
+_IDENT_RE = re.compile(r'\b([a-zA-Z_][a-zA-Z0-9_]{2,})\b')
+_FILENAME_SPLIT_RE = re.compile(r'[._\-/]')
+_TOKEN_RE = re.compile(r'[A-Za-z0-9_]+')
+_WORD_PATTERN_RE = re.compile(r'\\b(\w+)\\b')
+
+# Precompiled patterns shared by the haiku generator
+_ARTICLE_RE = re.compile(r' (?:the|a|an) ')
+_SPACE_RE = re.compile(r'\s+')
+
+# Common programming terms with syllable counts
+_TECH_DICT = {
+    'async': 2, 'await': 2, 'const': 1, 'let': 1, 'var': 1,
+    'function': 2, 'class': 1, 'import': 2, 'export': 2,
+    'return': 2, 'lambda': 2, 'def': 1, 'jsx': 3, 'tsx': 3,
+    'api': 3, 'json': 1, 'xml': 3, 'html': 4, 'css': 3,
+    'js': 2, 'ts': 2, 'py': 1, 'npm': 3, 'git': 1,
+    'test': 1, 'tests': 1, 'spec': 1, 'mock': 1,
+    'boolean': 3, 'string': 1, 'integer': 3, 'array': 2,
+    'object': 2, 'null': 1, 'undefined': 4, 'true': 1, 'false': 1,
+    'button': 2, 'component': 3, 'controller': 3, 'model': 2,
+    'view': 1, 'router': 2, 'service': 2, 'utils': 2,
+    'config': 2, 'error': 2, 'token': 2, 'auth': 1,
+    'login': 2, 'logout': 2, 'user': 2, 'admin': 2,
+    'database': 3, 'schema': 2, 'query': 2, 'cache': 1,
+    'redux': 2, 'react': 2, 'vue': 1, 'angular': 3,
+    'typescript': 3, 'javascript': 4, 'python': 2,
+    'docker': 2, 'kubernetes': 4, 'deploy': 2,
+    'build': 1, 'compile': 2, 'bundle': 2, 'webpack': 2,
+    'eslint': 2, 'prettier': 3, 'babel': 2,
+    'readme': 2, 'license': 2, 'changelog': 2,
+    'refactor': 3, 'cleanup': 2, 'optimize': 3,
+    'feature': 2, 'bugfix': 2, 'hotfix': 2, 'patch': 1,
+    'added': 2, 'removed': 2, 'updated': 3, 'fixed': 1,
+    'changed': 1, 'created': 3, 'deleted': 3,
+    'tested': 2, 'passed': 1, 'failed': 1, 'working': 2,
+    'better': 2, 'improved': 2, 'modified': 3, 'complete': 2,
+    'ready': 2, 'apply': 2, 'applied': 2,
+}
+
+
+class _SafeDict(dict):
+    """Mapping for str.format_map that leaves unknown placeholders intact"""
+    
+    def __missing__(self, key: str) -> str:
+        return '{' + key + '}'
+
+
+def _build_intent_matchers(categories: Tuple[Tuple[str, List[str]], ...]) -> Tuple[Dict[str, str], 're.Pattern']:
+    """Build a word lookup table and a fused regex from intent patterns"""
+    words = {}
+    others = []
+    for name, patterns in categories:
+        rest = []
+        for pattern in patterns:
+            # A plain r'\bword\b' pattern is an exact match on one token
+            match = _WORD_PATTERN_RE.fullmatch(pattern)
+            if match:
+                words.setdefault(match.group(1), name)
+            else:
+                rest.append(pattern)
+        if rest:
+            others.append(f"(?P<{name}>{'|'.join(rest)})")
+    
+    # '(?!)' never matches, for when every pattern is a plain word
+    return words, re.compile('|'.join(others) or '(?!)', re.IGNORECASE | re.ASCII)
+
 
 # Simple syllable counting using dictionary and heuristics
 class SyllableCounter:
     """Count syllables in words using a dictionary and fallback heuristics"""
     
+    __slots__ = ('custom_dict', 'tech_dict', '_lookup', '_cache', '_phrase_cache')
+    
     def __init__(self, custom_dict: Optional[Dict[str, int]] = None):
         """Initialize with optional custom dictionary"""
         self.custom_dict = custom_dict or {}
-        # Common programming terms with syllable counts
-        self.tech_dict = {
-            'async': 2, 'await': 2, 'const': 1, 'let': 1, 'var': 1,
-            'function': 2, 'class': 1, 'import': 2, 'export': 2,
-            'return': 2, 'lambda': 2, 'def': 1, 'jsx': 3, 'tsx': 3,
-            'api': 3, 'json': 1, 'xml': 3, 'html': 4, 'css': 3,
-            'js': 2, 'ts': 2, 'py': 1, 'npm': 3, 'git': 1,
-            'test': 1, 'tests': 1, 'spec': 1, 'mock': 1,
-            'boolean': 3, 'string': 1, 'integer': 3, 'array': 2,
-            'object': 2, 'null': 1, 'undefined': 4, 'true': 1, 'false': 1,
-            'button': 2, 'component': 3, 'controller': 3, 'model': 2,
-            'view': 1, 'router': 2, 'service': 2, 'utils': 2,
-            'config': 2, 'error': 2, 'token': 2, 'auth': 1,
-            'login': 2, 'logout': 2, 'user': 2, 'admin': 2,
-            'database': 3, 'schema': 2, 'query': 2, 'cache': 1,
-            'redux': 2, 'react': 2, 'vue': 1, 'angular': 3,
-            'typescript': 3, 'javascript': 4, 'python': 2,
-            'docker': 2, 'kubernetes': 4, 'deploy': 2,
-            'build': 1, 'compile': 2, 'bundle': 2, 'webpack': 2,
-            'eslint': 2, 'prettier': 3, 'babel': 2,
-            'readme': 2, 'license': 2, 'changelog': 2,
-            'refactor': 3, 'cleanup': 2, 'optimize': 3,
-            'feature': 2, 'bugfix': 2, 'hotfix': 2, 'patch': 1,
-            'added': 2, 'removed': 2, 'updated': 3, 'fixed': 1,
-            'changed': 1, 'created': 3, 'deleted': 3,
-            'tested': 2, 'passed': 1, 'failed': 1, 'working': 2,
-            'better': 2, 'improved': 2, 'modified': 3, 'complete': 2,
-            'ready': 2, 'apply': 2, 'applied': 2,
-        }
+        # Memoized counts, keyed on the raw word and phrase
+        self._cache: Dict[str, int] = {}
+        self._phrase_cache: Dict[str, int] = {}
+        self.tech_dict = _TECH_DICT
+        # Single lookup table, custom entries take precedence
+        self._lookup = {**_TECH_DICT, **self.custom_dict} if self.custom_dict else _TECH_DICT
     
     def count_syllables(self, word: str) -> int:
         """Count syllables in a word"""
+        cached = self._cache.get(word)
+        if cached is not None:
+            return cached
+        
+        count = self._count_uncached(word)
+        self._cache[word] = count
+        return count
+    
+    def _count_uncached(self, word: str) -> int:
+        """Count syllables in a word without consulting the cache"""
         if not word:
             return 0
         
@@ -56,17 +126,14 @@ class SyllableCounter:
         word_lower = word.lower().strip()
         
         # Remove common programming symbols
-        word_clean = re.sub(r'[^a-z]', '', word_lower)
+        word_clean = _CLEAN_RE.sub('', word_lower)
         if not word_clean:
             return 0
         
-        # Check custom dictionary first
-        if word_clean in self.custom_dict:
-            return self.custom_dict[word_clean]
-        
-        # Check tech dictionary
-        if word_clean in self.tech_dict:
-            return self.tech_dict[word_clean]
+        # Check custom and tech dictionaries
+        known = self._lookup.get(word_clean)
+        if known is not None:
+            return known
         
         # Fallback to heuristic counting
         return self._heuristic_count(word_clean)
@@ -76,23 +143,16 @@ class SyllableCounter:
         if len(word) <= 1:
             return 1
         
-        # Count vowel groups
-        vowels = 'aeiouy'
-        syllables = 0
-        previous_was_vowel = False
-        
-        for i, char in enumerate(word):
-            is_vowel = char in vowels
-            if is_vowel and not previous_was_vowel:
-                syllables += 1
-            previous_was_vowel = is_vowel
+        # Count vowel groups: each consonant-to-vowel transition starts one
+        mask = word.translate(_VOWEL_MASK)
+        syllables = mask.count('01') + mask.startswith('1')
         
         # Adjust for silent 'e'
         if word.endswith('e') and syllables > 1:
             syllables -= 1
         
         # Adjust for common patterns
-        if word.endswith('le') and len(word) > 2 and word[-3] not in vowels:
+        if word.endswith('le') and len(word) > 2 and mask[-3] == '0':
             syllables += 1
         
         # Ensure at least 1 syllable
@@ -100,13 +160,25 @@ class SyllableCounter:
     
     def count_phrase(self, phrase: str) -> int:
         """Count syllables in a phrase"""
-        words = re.findall(r'[a-zA-Z]+', phrase)
-        return sum(self.count_syllables(word) for word in words)
+        cached = self._phrase_cache.get(phrase)
+        if cached is not None:
+            return cached
+        
+        words = _WORD_RE.findall(phrase)
+        count = sum(map(self.count_syllables, words))
+        self._phrase_cache[phrase] = count
+        return count
+    
+    def count_phrases(self, phrases: Iterable[str]) -> List[int]:
+        """Count syllables in each of several phrases"""
+        return list(map(self.count_phrase, phrases))
 
 
 class DiffAnalyzer:
     """Analyze git diff to extract intent and keywords"""
     
+    __slots__ = ('intent', 'files', 'keywords')
+    
     # Intent patterns
     FIX_PATTERNS = [
         r'\bfix\b', r'\bbug\b', r'\bpatch\b', r'\berror\b',
@@ -127,10 +199,30 @@ class DiffAnalyzer:
         r'\btest\b', r'\.spec\.', r'\.test\.', r'__test__'
     ]
     
+    # Markdown files are recognized by name (see DOCS_EXTENSIONS), not content
     DOCS_PATTERNS = [
-        r'\bdoc\b', r'\breadme\b', r'\.md$', r'\bcomment\b'
+        r'\bdoc\b', r'\breadme\b', r'\bcomment\b'
     ]
     
+    # Maximum number of keywords to keep
+    MAX_KEYWORDS = 10
+    
+    # File name signals checked before scanning diff content
+    DOCS_EXTENSIONS = ('.md', '.rst')
+    TEST_FILE_MARKERS = ('.test.', '.spec.', '__test__')
+    
+    # Intent categories in order of priority
+    INTENT_PRIORITY = ('test', 'docs', 'fix', 'feature', 'refactor')
+    
+    # Intent matchers: a word table plus one regex for the other patterns
+    _INTENT_WORDS, _INTENT_RE = _build_intent_matchers((
+        ('test', TEST_PATTERNS),
+        ('docs', DOCS_PATTERNS),
+        ('fix', FIX_PATTERNS),
+        ('feature', FEATURE_PATTERNS),
+        ('refactor', REFACTOR_PATTERNS),
+    ))
+    
     def __init__(self):
         self.intent = 'change'  # default
         self.files = []
@@ -138,14 +230,50 @@ class DiffAnalyzer:
         
     def analyze(self, diff_output: str) -> Dict[str, any]:
         """Analyze the git diff and extract information"""
+        return self.analyze_stream(diff_output.splitlines())
+    
+    def analyze_stream(self, lines: Iterable[str]) -> Dict[str, any]:
+        """Analyze git diff lines as they arrive (trailing newlines are fine)"""
         # Reset state
         self.intent = 'change'
         self.files = []
         self.keywords = []
         
-        self._detect_intent(diff_output)
-        self._extract_files(diff_output)
-        self._extract_keywords(diff_output)
+        found = set()  # Matched intent categories
+        keywords: Dict[str, None] = {}  # Insertion-ordered set
+        additions = 0
+        deletions = 0
+        
+        # Walk the diff once, dispatching each line on its prefix
+        for line in lines:
+            prefix = line[:1]
+            if prefix == '+':
+                if not line.startswith('+++ '):
+                    additions += 1
+                    self._scan_intent(line, found)
+                    if len(keywords) < self.MAX_KEYWORDS:
+                        self._extract_keywords(line[1:], keywords)
+                    continue
+            elif prefix == '-':
+                if not line.startswith('--- '):
+                    deletions += 1
+                    continue
+            elif prefix == 'd':
+                if not line.startswith('diff --git '):
+                    continue
+            else:
+                if prefix == '@' and line.startswith('@@') and len(keywords) < self.MAX_KEYWORDS:
+                    # Hunk headers often name the enclosing function
+                    self._extract_functions(line, keywords)
+                continue
+            
+            # Only file headers ('diff --git', '+++', '---') reach here
+            self._extract_file(line, found, keywords)
+        
+        self._detect_intent(found, additions, deletions)
+        
+        # Keep the first keywords seen, in order
+        self.keywords = list(keywords)[:self.MAX_KEYWORDS]
         
         return {
             'intent': self.intent,
@@ -153,25 +281,36 @@ class DiffAnalyzer:
             'keywords': self.keywords
         }
     
-    def _detect_intent(self, diff: str):
+    def _scan_intent(self, line: str, found: set):
+        """Record the intent categories matched by a line"""
+        if 'test' in found:
+            return  # Highest priority, nothing can beat it
+        
+        # Literal keywords: tokenize once and look each token up
+        for token in _TOKEN_RE.findall(line):
+            intent = self._INTENT_WORDS.get(token.lower())
+            if intent:
+                found.add(intent)
+        
+        # Remaining patterns such as '.spec.' and '__test__'
+        for match in self._INTENT_RE.finditer(line):
+            found.add(match.lastgroup)
+    
+    def _detect_intent(self, found: set, additions: int, deletions: int):
         """Detect the primary intent of the changes"""
-        diff_lower = diff.lower()
-        
-        # Check in order of priority
-        if any(re.search(pattern, diff_lower) for pattern in self.TEST_PATTERNS):
-            self.intent = 'test'
-        elif any(re.search(pattern, diff_lower) for pattern in self.DOCS_PATTERNS):
-            self.intent = 'docs'
-        elif any(re.search(pattern, diff_lower) for pattern in self.FIX_PATTERNS):
-            self.intent = 'fix'
-        elif any(re.search(pattern, diff_lower) for pattern in self.FEATURE_PATTERNS):
-            self.intent = 'feature'
-        elif any(re.search(pattern, diff_lower) for pattern in self.REFACTOR_PATTERNS):
-            self.intent = 'refactor'
+        # File names alone decide when every file agrees
+        intent = self._intent_from_files(self.files)
+        if intent:
+            self.intent = intent
+            return
+        
+        # Pick the highest priority category
+        for intent in self.INTENT_PRIORITY:
+            if intent in found:
+                self.intent = intent
+                break
         else:
             # Check if mostly additions
-            additions = len(re.findall(r'^\+[^+]', diff, re.MULTILINE))
-            deletions = len(re.findall(r'^-[^-]', diff, re.MULTILINE))
             if additions > deletions * 2:
                 self.intent = 'feature'
             elif deletions > additions * 2:
@@ -179,55 +318,67 @@ class DiffAnalyzer:
             else:
                 self.intent = 'update'
     
-    def _extract_files(self, diff: str):
-        """Extract modified file names"""
-        # Match file paths in diff headers
-        file_pattern = r'(?:diff --git a/|[\+\-]{3} [ab]/)([^\s]+)'
-        files = re.findall(file_pattern, diff)
-        
-        # Get unique files and extract meaningful names
-        seen = set()
-        for file_path in files:
-            if file_path != '/dev/null':
-                # Get just the filename
-                filename = os.path.basename(file_path)
-                if filename not in seen:
-                    seen.add(filename)
-                    self.files.append(filename)
-    
-    def _extract_keywords(self, diff: str):
-        """Extract keywords from the diff"""
-        keywords = set()
-        
-        # Extract from filenames
-        for filename in self.files:
-            # Split on common delimiters
-            parts = re.split(r'[._\-/]', filename)
-            for part in parts:
-                if len(part) > 2:  # Skip very short parts
-                    keywords.add(part.lower())
-        
-        # Extract function/class names
-        function_pattern = r'(?:function|def|class|const|let|var)\s+([a-zA-Z_][a-zA-Z0-9_]*)'
-        functions = re.findall(function_pattern, diff)
-        keywords.update(f.lower() for f in functions if len(f) > 2)
-        
-        # Extract from added/modified lines (lines starting with +)
-        added_lines = re.findall(r'^\+(.*)$', diff, re.MULTILINE)
-        for line in added_lines:
-            # Extract identifiers
-            identifiers = re.findall(r'\b([a-zA-Z_][a-zA-Z0-9_]{2,})\b', line)
-            keywords.update(i.lower() for i in identifiers[:3])  # Limit per line
-        
-        # Keep most relevant keywords (limit to 10)
-        self.keywords = list(keywords)[:10]
+    def _intent_from_files(self, files: List[str]) -> Optional[str]:
+        """Detect intent from file names alone, if they all agree"""
+        if not files:
+            return None
+        
+        names = [filename.lower() for filename in files]
+        if all(name.endswith(self.DOCS_EXTENSIONS) for name in names):
+            return 'docs'
+        if all(any(marker in name for marker in self.TEST_FILE_MARKERS) for name in names):
+            return 'test'
+        return None
+    
+    def _extract_file(self, line: str, found: set, keywords: Dict[str, None]):
+        """Extract the modified file name from a diff header line"""
+        match = _FILE_RE.match(line)
+        if not match or match.group(1) == '/dev/null':
+            return
+        
+        # Any test file among the changes marks the commit as a test
+        path = match.group(1).lower()
+        if any(marker in path for marker in self.TEST_FILE_MARKERS):
+            found.add('test')
+        
+        # Get just the filename (git always uses forward slashes)
+        filename = match.group(1).rpartition('/')[2]
+        if filename in self.files:
+            return
+        self.files.append(filename)
+        
+        # Split on common delimiters
+        parts = _FILENAME_SPLIT_RE.split(filename)
+        for part in parts:
+            if len(part) > 2:  # Skip very short parts
+                keywords.setdefault(part.lower(), None)
+    
+    def _extract_functions(self, line: str, keywords: Dict[str, None]):
+        """Extract function/class names from a line"""
+        functions = _FUNC_RE.findall(line)
+        for function in functions:
+            if len(function) > 2:
+                keywords.setdefault(function.lower(), None)
+    
+    def _extract_keywords(self, line: str, keywords: Dict[str, None]):
+        """Extract keywords from an added line"""
+        self._extract_functions(line, keywords)
+        
+        # Extract identifiers, stopping the scan after the first few
+        identifiers = islice(_IDENT_RE.finditer(line), 3)  # Limit per line
+        for match in identifiers:
+            keywords.setdefault(match.group(1).lower(), None)
 
 
 class HaikuGenerator:
     """Generate haiku based on analysis"""
     
+    __slots__ = ('counter', 'templates', 'fillers_5', 'fillers_7', 'fillers_by_target', '_adjust_cache')
+    
     def __init__(self, syllable_counter: SyllableCounter):
         self.counter = syllable_counter
+        # Memoized _adjust_syllables results, keyed on (line, target)
+        self._adjust_cache: Dict[Tuple[str, int], Optional[str]] = {}
         
         # Templates for different intents
         self.templates = {
@@ -277,13 +428,19 @@ class HaikuGenerator:
         ]
         
         self.fillers_7 = [
-            "Applied to fix the problem", "Modified to improve flow",
+            "Modified to improve flow", "Applied to fix the problem",
             "Validating the new code", "Structure improved throughout",
             "Documentation improved here", "Better than before for sure",
             "Ready for use in production", "All the changes work as planned",
             "Everything is fixed and good", "Added to enhance the project",
         ]
         
+        # Filler syllable counts, computed once per generator
+        self.fillers_by_target = {
+            5: [(filler, self.counter.count_phrase(filler)) for filler in self.fillers_5],
+            7: [(filler, self.counter.count_phrase(filler)) for filler in self.fillers_7],
+        }
+        
     def generate(self, analysis: Dict) -> str:
         """Generate a haiku from the analysis"""
         intent = analysis['intent']
@@ -293,6 +450,10 @@ class HaikuGenerator:
         # Get template
         templates = self.templates.get(intent, self.templates['update'])
         
+        # Warm the syllable cache so template retries only hit the cache
+        for keyword in keywords:
+            self.counter.count_phrase(keyword)
+        
         # Build haiku lines
         lines = self._build_haiku(intent, files, keywords, templates)
         
@@ -303,36 +464,33 @@ class HaikuGenerator:
         
         # Extract useful terms
         file_name = files[0] if files else 'code'
-        file_base = os.path.splitext(file_name)[0] if files else 'file'
+        file_base = (file_name.rpartition('.')[0] or file_name) if files else 'file'
         keyword1 = keywords[0] if len(keywords) > 0 else 'change'
         keyword2 = keywords[1] if len(keywords) > 1 else 'update'
         
-        # Try each template
+        # Substitution mapping, shared by every template
+        subs = _SafeDict(
+            problem=f"{keyword1} error",
+            action=f"Fixed {keyword2}",
+            result="Working now",
+            feature=keyword1,
+            description=f"{keyword2} in {file_base}",
+            benefit="Improved code",
+            file=file_base,
+        )
+        
+        # Try each template, stopping at the first that fits
         for template in templates:
-            try:
-                lines = self._try_template(template, intent, file_base, file_name, keyword1, keyword2)
-                if lines:
-                    return lines
-            except:
-                continue
+            lines = self._try_template(template, subs)
+            if lines:
+                return lines
         
         # Fallback to simple haiku
         return self._generate_simple_haiku(intent, file_base, keyword1)
     
-    def _try_template(self, template: Tuple[str, str, str], intent: str, file_base: str, file_name: str, keyword1: str, keyword2: str) -> Optional[List[str]]:
+    def _try_template(self, template: Tuple[str, str, str], subs: Dict[str, str]) -> Optional[List[str]]:
         """Try to fill a template and adjust to 5-7-5"""
         
-        # Substitution mapping
-        subs = {
-            '{problem}': f"{keyword1} error",
-            '{action}': f"Fixed {keyword2}",
-            '{result}': "Working now",
-            '{feature}': keyword1,
-            '{description}': f"{keyword2} in {file_base}",
-            '{benefit}': "Improved code",
-            '{file}': file_base,
-        }
-        
         lines = []
         target_syllables = [5, 7, 5]
         
@@ -340,10 +498,7 @@ class HaikuGenerator:
             target = target_syllables[i]
             
             # Substitute variables
-            line = line_template
-            for var, value in subs.items():
-                if var in line:
-                    line = line.replace(var, value)
+            line = line_template.format_map(subs)
             
             # Adjust syllables
             line = self._adjust_syllables(line, target)
@@ -355,27 +510,33 @@ class HaikuGenerator:
     
     def _adjust_syllables(self, line: str, target: int) -> Optional[str]:
         """Adjust line to target syllable count"""
-        current = self.counter.count_phrase(line)
+        key = (line, target)
+        if key in self._adjust_cache:
+            return self._adjust_cache[key]
+        
+        adjusted = self._adjust_uncached(line, target)
+        self._adjust_cache[key] = adjusted
+        return adjusted
+    
+    def _adjust_uncached(self, line: str, target: int) -> Optional[str]:
+        """Adjust line to target syllable count without consulting the cache"""
+        count_phrase = self.counter.count_phrase  # Bound once for the loop below
+        current = count_phrase(line)
         
         if current == target:
             return line
         
         # Try minor adjustments
         if current > target:
-            diff = current - target
-            # Try removing articles or shortening
-            if diff >= 1 and ' the ' in line:
-                line = line.replace(' the ', ' ', 1)
-                line = re.sub(r'\s+', ' ', line).strip()
-            elif diff >= 1 and ' a ' in line:
-                line = line.replace(' a ', ' ', 1)
-                line = re.sub(r'\s+', ' ', line).strip()
-            elif diff >= 1 and ' an ' in line:
-                line = line.replace(' an ', ' ', 1)
-                line = re.sub(r'\s+', ' ', line).strip()
+            # Remove articles one at a time until we reach the target
+            while current > target:
+                line, removed = _ARTICLE_RE.subn(' ', line, count=1)
+                if not removed:
+                    break
+                line = _SPACE_RE.sub(' ', line).strip()
+                current = count_phrase(line)
             
             # Check if we've matched target
-            current = self.counter.count_phrase(line)
             if current == target:
                 return line
         
@@ -387,7 +548,7 @@ class HaikuGenerator:
                 # Add 'now' at the end if appropriate
                 if not line.endswith(' now'):
                     test_line = f"{line} now"
-                    if self.counter.count_phrase(test_line) == target:
+                    if count_phrase(test_line) == target:
                         return test_line
         
         # If close enough, return the line
@@ -430,11 +591,16 @@ class HaikuGenerator:
             line3 = "Changes applied"
         
         # Adjust each line
-        line1 = self._adjust_syllables(line1, 5) or "Code changes made here"
-        line2 = self._adjust_syllables(line2, 7) or "Modified to work better now"
-        line3 = self._adjust_syllables(line3, 5) or "Working well now"
+        line1 = self._adjust_syllables(line1, 5) or self._pick_filler(5)
+        line2 = self._adjust_syllables(line2, 7) or self._pick_filler(7)
+        line3 = self._adjust_syllables(line3, 5) or self._pick_filler(5, exclude=line1)
         
         return [line1, line2, line3]
+    
+    def _pick_filler(self, target: int, exclude: Optional[str] = None) -> str:
+        """Pick a filler phrase, preferring one that hits the target exactly"""
+        fillers = [(filler, count) for filler, count in self.fillers_by_target[target] if filler != exclude]
+        return next((filler for filler, count in fillers if count == target), fillers[0][0])
 
 
 def load_custom_dict() -> Dict[str, int]:
@@ -449,36 +615,44 @@ def load_custom_dict() -> Dict[str, int]:
             try:
                 with open(path, 'r') as f:
                     data = json.load(f)
-                    return data.get('syllables', {})
-            except:
-                pass
+            except (OSError, ValueError):
+                continue
+            
+            # Ignore configs that aren't shaped like {"syllables": {...}}
+            if not isinstance(data, dict):
+                continue
+            syllables = data.get('syllables', {})
+            if isinstance(syllables, dict):
+                return syllables
     
     return {}
 
 
-def get_staged_diff() -> str:
-    """Get the staged git diff"""
-    try:
-        result = subprocess.run(
-            ['git', 'diff', '--staged'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return result.stdout
-    except subprocess.CalledProcessError:
-        return ""
+def get_staged_diff() -> Iterator[str]:
+    """Stream the staged git diff line by line"""
+    with subprocess.Popen(
+        ['git', 'diff', '--staged'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True
+    ) as proc:
+        yield from proc.stdout
 
 
 def main():
     """Main entry point"""
     # Get diff from stdin or command line argument
     if len(sys.argv) > 1 and sys.argv[1] == '--diff':
-        diff = sys.stdin.read() if len(sys.argv) == 2 else ' '.join(sys.argv[2:])
+        lines = sys.stdin if len(sys.argv) == 2 else ' '.join(sys.argv[2:]).splitlines()
     else:
-        diff = get_staged_diff()
+        lines = get_staged_diff()
     
-    if not diff.strip():
+    # Skip leading blank lines to find out whether anything is staged
+    lines = iter(lines)
+    for first_line in lines:
+        if first_line.strip():
+            break
+    else:
         print("No changes staged")
         sys.exit(1)
     
@@ -491,7 +665,7 @@ def main():
     generator = HaikuGenerator(counter)
     
     # Analyze and generate
-    analysis = analyzer.analyze(diff)
+    analysis = analyzer.analyze_stream(chain([first_line], lines))
     haiku = generator.generate(analysis)
     
     # Output the haiku